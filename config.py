@@ -1,6 +1,12 @@
+import functools
 import json
 import os
 import hashlib
+import struct
+import threading
+import time
+
+import fastjson
 
 # --- CONFIGURATION FILE SETUP ---
 HOST_CONFIG_FILE = "host_config.json"
@@ -35,10 +41,31 @@ def load_host_ip():
         raise Exception(f"FATAL: Error loading host configuration: {e}")
 
 # --- NETWORK CONFIGURATION ---
-HOST_YGGDRASIL_IP = load_host_ip()
+
+@functools.lru_cache(maxsize=1)
+def host_ip():
+    """
+    Returns this host's Yggdrasil IP, loading host_config.json on first use.
+    Lazy so that importing config (for tests, tooling, --help) never pays the
+    file read or fails on a missing config file.
+    """
+    return load_host_ip()
+
 PORT = 8888
 CHUNK_SIZE = 1024 * 1024  # 1 MB per chunk
 
+# --- HASHING CONFIGURATION ---
+# All peers must agree on this. BLAKE2b at a 32-byte digest matches SHA-256's
+# collision resistance but hashes noticeably faster in software.
+HASH_ALGO = "blake2b"
+HASH_READ_SIZE = 1024 * 1024  # 1 MB reads amortize syscall + loop overhead
+
+def new_hasher():
+    """Returns a fresh hash object for the configured HASH_ALGO."""
+    if HASH_ALGO == "blake2b":
+        return hashlib.blake2b(digest_size=32)
+    return hashlib.new(HASH_ALGO)
+
 # --- DIRECTORY CONFIGURATION ---
 FILE_DIRECTORY = "./shared_files"
 DOWNLOAD_DIRECTORY = "./downloaded_files"
@@ -46,66 +73,194 @@ PEER_LIST_FILE = "known_peers.json"
 # The Index that tracks all chunks this peer is hosting (used by REPORT_AVAILABILITY)
 LOCAL_MASTER_INDEX_FILE = "local_index.json"
 
+# --- WIRE PROTOCOL FRAMING ---
+# Commands and response headers travel as length-prefixed frames (4-byte
+# big-endian length + payload) so many requests can share one TCP connection
+# without delimiter ambiguity. Bulk payloads (chunk bytes, JSON blobs) follow
+# their header frame raw, with the size announced in the header.
+_FRAME_HEADER = struct.Struct(">I")
+
+# Command frames are tiny (the largest legal command is the OP_CHUNK layout
+# plus a 65535-byte filename), so cap the advertised length: without this a
+# single forged header makes recv_frame preallocate gigabytes before any
+# payload arrives.
+MAX_FRAME_SIZE = 64 * 1024
+
+def send_frame(sock, payload):
+    """Sends one length-prefixed frame."""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    sock.sendall(_FRAME_HEADER.pack(len(payload)) + payload)
+
+def recv_exact(sock, size):
+    """Receives exactly size bytes, or None if the peer closed early."""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:])
+        if not n:
+            return None
+        received += n
+    return bytes(buf)
+
+def recv_frame(sock):
+    """Receives one length-prefixed frame, or None if the peer closed."""
+    header = recv_exact(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None
+    (length,) = _FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        # Protocol error: callers treat this as a dead connection
+        raise ValueError(f"Frame length {length} exceeds limit of {MAX_FRAME_SIZE} bytes")
+    return recv_exact(sock, length)
+
+# --- COMMAND OPCODES ---
+# Command frames are binary: a 1-byte opcode followed by an op-specific
+# fixed layout. OP_CHUNK carries a 4-byte chunk id, a 2-byte name length and
+# the UTF-8 filename, so filenames containing ':' are unambiguous and the
+# server parses one struct.unpack_from instead of decode + split.
+OP_LIST = 1
+OP_CHUNK = 2
+OP_PEERS = 3
+OP_REPORT = 4
+
+_CHUNK_CMD = struct.Struct(">BIH")
+
+def pack_chunk_request(filename, chunk_id):
+    """Builds the binary OP_CHUNK command frame payload."""
+    name = filename.encode('utf-8')
+    return _CHUNK_CMD.pack(OP_CHUNK, chunk_id, len(name)) + name
+
+def unpack_chunk_request(frame):
+    """Parses an OP_CHUNK frame back into (filename, chunk_id)."""
+    _, chunk_id, nlen = _CHUNK_CMD.unpack_from(frame)
+    offset = _CHUNK_CMD.size
+    return frame[offset:offset + nlen].decode('utf-8'), chunk_id
+
 # --- UTILITY FUNCTIONS ---
 
-def load_peers():
-    """Loads the list of known Yggdrasil addresses."""
+# In-memory set of known peers. Loaded from disk once, then every lookup
+# and membership test is O(1) in memory; disk is only touched when the set
+# actually changes (gossip exchanges with already-known peers are free).
+# Writes are additionally throttled: a burst of new peers costs at most one
+# JSON re-serialize per interval, and the gossiper flushes stragglers.
+_PEERS = None
+_PEERS_LOCK = threading.Lock()
+_PEERS_DIRTY = False
+_PEERS_LAST_SAVE = 0.0
+PEER_SAVE_INTERVAL_SECONDS = 5.0
+
+def _read_peers_from_disk():
+    """Reads the persisted peer list into a set (internal helper)."""
     if not os.path.exists(PEER_LIST_FILE):
-        return []
+        return set()
     try:
-        with open(PEER_LIST_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
+        with open(PEER_LIST_FILE, 'rb') as f:
+            return set(fastjson.loads(f.read()))
+    except (ValueError, IOError):
         print(f"Warning: Failed to load {PEER_LIST_FILE}. Starting fresh.")
-        return []
+        return set()
 
-def save_peers(peers):
-    """Saves the current list of known Yggdrasil addresses."""
+def _write_peers_to_disk(peers):
+    """Persists the peer set to disk (internal helper, caller holds the lock)."""
     os.makedirs(os.path.dirname(PEER_LIST_FILE) or '.', exist_ok=True)
-    with open(PEER_LIST_FILE, 'w') as f:
-        unique_peers = list(set(peers))
-        # Ensure the current host IP is always in the list
-        if HOST_YGGDRASIL_IP not in unique_peers:
-            unique_peers.append(HOST_YGGDRASIL_IP)
+    with open(PEER_LIST_FILE, 'wb') as f:
+        f.write(fastjson.dumps(list(peers), indent=True))
 
-        json.dump(unique_peers, f, indent=4)
+def load_peers():
+    """Returns a snapshot set of known Yggdrasil addresses."""
+    global _PEERS
+    with _PEERS_LOCK:
+        if _PEERS is None:
+            _PEERS = _read_peers_from_disk()
+        return set(_PEERS)
 
-def get_local_hosted_hashes():
+def save_peers(peers):
+    """Merges peers into the known set and persists it if anything changed."""
+    global _PEERS
+    with _PEERS_LOCK:
+        if _PEERS is None:
+            _PEERS = _read_peers_from_disk()
+        before = len(_PEERS)
+        _PEERS.update(peers)
+        # Ensure the current host IP is always in the set
+        _PEERS.add(host_ip())
+        if len(_PEERS) != before:
+            _write_peers_to_disk(_PEERS)
+
+def add_peer(peer_ip):
     """
-    Reads the LOCAL_MASTER_INDEX_FILE and returns a list of
-    ALL chunk hashes contained within it.
+    Adds a single peer to the in-memory set. Returns True if it was new.
+    Disk writes are throttled to one per PEER_SAVE_INTERVAL_SECONDS;
+    anything still pending is picked up by flush_peers().
     """
-    if not os.path.exists(LOCAL_MASTER_INDEX_FILE):
-        return []
+    global _PEERS, _PEERS_DIRTY, _PEERS_LAST_SAVE
+    with _PEERS_LOCK:
+        if _PEERS is None:
+            _PEERS = _read_peers_from_disk()
+        if peer_ip in _PEERS:
+            return False
+        _PEERS.add(peer_ip)
+        _PEERS_DIRTY = True
+        now = time.monotonic()
+        if now - _PEERS_LAST_SAVE >= PEER_SAVE_INTERVAL_SECONDS:
+            _write_peers_to_disk(_PEERS)
+            _PEERS_DIRTY = False
+            _PEERS_LAST_SAVE = now
+        return True
 
-    hosted_hashes = []
-    try:
-        with open(LOCAL_MASTER_INDEX_FILE, 'r') as f:
-            master_index = json.load(f)
+def flush_peers():
+    """Writes the peer set to disk if any additions are still unsaved."""
+    global _PEERS_DIRTY, _PEERS_LAST_SAVE
+    with _PEERS_LOCK:
+        if _PEERS_DIRTY and _PEERS is not None:
+            _write_peers_to_disk(_PEERS)
+            _PEERS_DIRTY = False
+            _PEERS_LAST_SAVE = time.monotonic()
 
-        # Iterate through every file in the index
-        for file_metadata in master_index.values():
-            # Iterate through every chunk in the file
-            for chunk in file_metadata.get('chunks', []):
-                hosted_hashes.append(chunk['hash'])
+def iter_hosted_hashes():
+    """
+    Yields every chunk hash in LOCAL_MASTER_INDEX_FILE, one at a time,
+    without materializing the flat list.
+    """
+    if not os.path.exists(LOCAL_MASTER_INDEX_FILE):
+        return
 
+    try:
+        with open(LOCAL_MASTER_INDEX_FILE, 'rb') as f:
+            master_index = fastjson.loads(f.read())
     except Exception as e:
         print(f"Error reading local index: {e}")
-        return []
+        return
 
-    return hosted_hashes
+    # Iterate through every file in the index
+    for file_metadata in master_index.values():
+        # Iterate through every chunk in the file
+        for chunk in file_metadata.get('chunks', []):
+            yield chunk['hash']
+
+def get_local_hosted_hashes():
+    """
+    Reads the LOCAL_MASTER_INDEX_FILE and returns a list of
+    ALL chunk hashes contained within it.
+    """
+    return list(iter_hosted_hashes())
 
 
 def calculate_hash(filepath):
-    """Calculates the SHA-256 hash of a file in chunks."""
-    sha256 = hashlib.sha256()
+    """Calculates the HASH_ALGO hash of a file in chunks."""
     with open(filepath, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):
+            # 3.11+: the read/update loop runs in C with the GIL released
+            return hashlib.file_digest(f, new_hasher).hexdigest()
+        hasher = new_hasher()
         while True:
-            data = f.read(4096)
+            data = f.read(HASH_READ_SIZE)
             if not data:
                 break
-            sha256.update(data)
-    return sha256.hexdigest()
+            hasher.update(data)
+        return hasher.hexdigest()
 
 def ensure_initial_setup():
     """Ensures directories exist and creates a dummy file for testing."""
@@ -139,5 +294,5 @@ if __name__ == '__main__':
     ensure_initial_setup()
     # Initialize or update peer list with self
     save_peers(load_peers())
-    print(f"Host IP: {HOST_YGGDRASIL_IP}")
+    print(f"Host IP: {host_ip()}")
 
@@ -0,0 +1,32 @@
+"""
+Thin wrapper around the fastest available JSON implementation.
+
+orjson encodes/decodes several times faster than the stdlib and returns
+bytes directly, which is what the network paths want anyway. Falls back to
+the stdlib json module when orjson isn't installed, so nothing here is a
+hard dependency.
+"""
+
+try:
+    import orjson
+
+    def dumps(obj, indent=False):
+        """Encodes obj to JSON bytes (indent=True for human-readable disk files)."""
+        if indent:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        return orjson.dumps(obj)
+
+    def loads(data):
+        """Decodes JSON from bytes, bytearray or str."""
+        return orjson.loads(data)
+
+except ImportError:
+    import json as _json
+
+    def dumps(obj, indent=False):
+        """Encodes obj to JSON bytes (indent=True for human-readable disk files)."""
+        return _json.dumps(obj, indent=4 if indent else None).encode('utf-8')
+
+    def loads(data):
+        """Decodes JSON from bytes, bytearray or str."""
+        return _json.loads(data)
@@ -1,9 +1,11 @@
 import socket
-import json
+import fastjson
 import os
+import shutil
 import sys
-import hashlib
 import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import *
 
 #try:
@@ -13,26 +15,37 @@ from config import *
 
 # --- CORE CLIENT FUNCTIONS ---
 
+def connect_to_peer(target_ip):
+    """Opens a persistent connection to a peer (caller is responsible for closing)."""
+    client_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+    # Commands are tiny writes; don't let Nagle delay them
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_socket.connect((target_ip, PORT))
+    return client_socket
+
 def get_remote_file_list(target_ip):
     """Connects to a peer and requests the full file index."""
-    client_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
     try:
-        client_socket.connect((target_ip, PORT))
-        client_socket.sendall("REQUEST_FILE_LIST".encode('utf-8'))
-        
-        header_data = client_socket.recv(1024).decode('utf-8').strip()
+        client_socket = connect_to_peer(target_ip)
+    except Exception as e:
+        print(f"❌ Error connecting to {target_ip}: {e}")
+        return {}
+    try:
+        send_frame(client_socket, bytes([OP_LIST]))
+
+        header = recv_frame(client_socket)
+        if header is None:
+            print(f"❌ Peer {target_ip} closed connection before sending file list.")
+            return {}
+        header_data = header.decode('utf-8').strip()
         if header_data.startswith("LIST_SIZE:"):
             size = int(header_data.split(":")[1])
-            client_socket.sendall(b"READY")
-            
-            # Receive full JSON payload (handle large JSONs in chunks)
-            received_data = b""
-            while len(received_data) < size:
-                packet = client_socket.recv(4096)
-                if not packet: break
-                received_data += packet
-            
-            return json.loads(received_data.decode('utf-8'))
+            # Receive full JSON payload into a preallocated buffer
+            # (bytes += in a loop re-copies everything received so far)
+            payload = recv_exact(client_socket, size)
+            if payload is None:
+                return {}
+            return fastjson.loads(payload)
         return {}
     except Exception as e:
         print(f"❌ Error getting file list from {target_ip}: {e}")
@@ -40,41 +53,47 @@ def get_remote_file_list(target_ip):
     finally:
         client_socket.close()
 
-def download_chunk(target_ip, filename, chunk_meta):
-    """Downloads a single chunk and verifies hash."""
+def download_chunk(client_socket, filename, chunk_meta):
+    """Downloads a single chunk over an open connection and verifies hash."""
     chunk_id = chunk_meta['id']
     chunk_hash = chunk_meta['hash']
     chunk_size = chunk_meta['size']
-    
+
     # Save to a temporary file
     temp_path = os.path.join(DOWNLOAD_DIRECTORY, f"{filename}.part{chunk_id}")
-    
+
     # Skip if already downloaded and verified (Resume capability)
     if os.path.exists(temp_path):
         if calculate_hash(temp_path) == chunk_hash:
             print(f"   ⏩ Chunk {chunk_id} already exists and is valid. Skipping.")
             return True
 
-    client_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
     try:
-        client_socket.connect((target_ip, PORT))
-        cmd = f"REQUEST_CHUNK:{filename}:{chunk_id}"
-        client_socket.sendall(cmd.encode('utf-8'))
-        
-        header = client_socket.recv(1024).decode('utf-8').strip()
+        send_frame(client_socket, pack_chunk_request(filename, chunk_id))
+
+        header = recv_frame(client_socket)
+        if header is None:
+            print(f"   ❌ Peer closed connection before Chunk {chunk_id}.")
+            return False
+        header = header.decode('utf-8').strip()
         if header.startswith("CHUNK_READY:"):
-            client_socket.sendall(b"READY")
-            
+
             received_bytes = 0
-            hasher = hashlib.sha256()
-            
+            hasher = new_hasher()
+
+            # Reusable receive buffer: recv_into writes straight into it, so we
+            # never allocate a fresh bytes object per packet
+            buf = bytearray(min(chunk_size, CHUNK_SIZE))
+            view = memoryview(buf)
+
             with open(temp_path, 'wb') as f:
                 while received_bytes < chunk_size:
-                    data = client_socket.recv(4096)
-                    if not data: break
-                    f.write(data)
-                    hasher.update(data)
-                    received_bytes += len(data)
+                    want = min(len(buf), chunk_size - received_bytes)
+                    n = client_socket.recv_into(view[:want])
+                    if not n: break
+                    f.write(view[:n])
+                    hasher.update(view[:n])
+                    received_bytes += n
             
             if hasher.hexdigest() == chunk_hash:
                 print(f"   ✅ Chunk {chunk_id} downloaded & verified.")
@@ -90,6 +109,19 @@ def download_chunk(target_ip, filename, chunk_meta):
     except Exception as e:
         print(f"   ❌ Exception downloading Chunk {chunk_id}: {e}")
         return False
+
+def download_chunks_from_peer(target_ip, filename, chunks):
+    """Downloads a batch of chunks over one persistent connection to a peer."""
+    try:
+        client_socket = connect_to_peer(target_ip)
+    except Exception as e:
+        print(f"   ❌ Could not connect to {target_ip}: {e}")
+        return False
+    try:
+        for chunk in chunks:
+            if not download_chunk(client_socket, filename, chunk):
+                return False
+        return True
     finally:
         client_socket.close()
 
@@ -97,24 +129,43 @@ def reassemble_file(filename, chunks_metadata):
     """Stitches all verified chunks back into the original file."""
     print(f"\n🧩 Reassembling '{filename}'...")
     final_path = os.path.join(DOWNLOAD_DIRECTORY, filename)
-    
+
+    # Sort chunks by ID to ensure correct order
+    chunks_metadata.sort(key=lambda x: x['id'])
+
+    # Verify every part is present BEFORE creating the output file
+    part_paths = []
+    for chunk in chunks_metadata:
+        part_path = os.path.join(DOWNLOAD_DIRECTORY, f"{filename}.part{chunk['id']}")
+        if not os.path.exists(part_path):
+            print(f"   ❌ Missing chunk {chunk['id']}. Reassembly failed.")
+            return
+        part_paths.append(part_path)
+
+    total_size = sum(c['size'] for c in chunks_metadata)
     with open(final_path, 'wb') as outfile:
-        # Sort chunks by ID to ensure correct order
-        chunks_metadata.sort(key=lambda x: x['id'])
-        
-        for chunk in chunks_metadata:
-            part_path = os.path.join(DOWNLOAD_DIRECTORY, f"{filename}.part{chunk['id']}")
-            
-            if not os.path.exists(part_path):
-                print(f"   ❌ Missing chunk {chunk['id']}. Reassembly failed.")
-                return
-            
+        # Size the file up front, then let os.sendfile copy each part
+        # kernel-side — no 1 MB Python bytes object per chunk
+        outfile.truncate(total_size)
+
+        for chunk, part_path in zip(chunks_metadata, part_paths):
             with open(part_path, 'rb') as infile:
-                outfile.write(infile.read())
-            
+                if hasattr(os, 'sendfile'):
+                    offset = 0
+                    while offset < chunk['size']:
+                        sent = os.sendfile(outfile.fileno(), infile.fileno(),
+                                           offset, chunk['size'] - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                else:
+                    # Windows etc.: copyfileobj loops in C; 1 MB buffers sit
+                    # well past the per-byte cost knee (~64 KB)
+                    shutil.copyfileobj(infile, outfile, length=1 << 20)
+
             # Clean up temp part file
             os.remove(part_path)
-            
+
     print(f"🎉 Success! File saved to: {final_path}")
 
 # --- MAIN EXECUTION ---
@@ -124,7 +175,7 @@ def start_download_manager():
     peers = load_peers()
     
     # 1. Find a target peer (simple selection for now)
-    target_peer = next((p for p in peers if p != HOST_YGGDRASIL_IP), None)
+    target_peer = next((p for p in peers if p != host_ip()), None)
     if not target_peer:
         print("❌ No peers found in known_peers.json.")
         return
@@ -150,20 +201,36 @@ def start_download_manager():
         print("Invalid selection.")
         return
 
-    # 3. Start Download Loop
+    # 3. Start Download Loop (chunks are independent, so pull them in parallel)
     file_meta = file_index[target_filename]
     chunks = file_meta['chunks']
     print(f"\n⬇️ Starting download of '{target_filename}' ({len(chunks)} chunks)...")
 
-    # In a real swarm, this loop would be multi-threaded!
+    # Round-robin chunk batches across every known peer (excluding ourselves).
+    # Each worker keeps ONE connection open for its whole batch instead of
+    # paying a TCP handshake + slow start per chunk.
+    available_peers = [p for p in peers if p != host_ip()]
+    peer_iter = itertools.cycle(available_peers)
+
     all_chunks_success = True
-    for chunk in chunks:
-        success = download_chunk(target_peer, target_filename, chunk)
-        if not success:
-            all_chunks_success = False
-            print("🛑 Download aborted due to chunk error.")
-            break
-    
+    # A zero-byte file indexes with no chunks; skip straight to reassembly
+    # (ThreadPoolExecutor rejects max_workers=0)
+    if chunks:
+        num_workers = min(8, len(chunks))
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(download_chunks_from_peer, next(peer_iter),
+                                target_filename, chunks[i::num_workers])
+                for i in range(num_workers)
+            ]
+            for future in as_completed(futures):
+                if not future.result():
+                    all_chunks_success = False
+                    print("🛑 Download aborted due to chunk error.")
+                    for f in futures:
+                        f.cancel()
+                    break
+
     # 4. Reassemble
     if all_chunks_success:
         reassemble_file(target_filename, chunks)
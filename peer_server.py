@@ -1,12 +1,15 @@
 import socket
 import threading
 import time
-import json
+import fastjson
+import mmap
 import os
 import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # --- IMPORTS FROM CONFIG.PY (Re-enabled) ---
-# NOTE: Assuming config.py is available and contains all constants (HOST_YGGDRASIL_IP, PORT, FILE_DIRECTORY, etc.)
+# NOTE: Assuming config.py is available and contains all constants (host_ip, PORT, FILE_DIRECTORY, etc.)
 try:
     from config import *
 except ImportError:
@@ -34,8 +37,8 @@ def auto_index_shared_files():
     if os.path.exists(LOCAL_MASTER_INDEX_FILE):
         try:
             with open(LOCAL_MASTER_INDEX_FILE, 'r') as f:
-                current_index = json.load(f)
-        except json.JSONDecodeError:
+                current_index = fastjson.loads(f.read())
+        except ValueError:
             current_index = {}
     else:
         current_index = {}
@@ -50,14 +53,17 @@ def auto_index_shared_files():
         if not os.path.isfile(filepath) or filename.startswith('.'):
             continue
             
-        # Check if file needs indexing (Logic: If not in index OR size changed)
+        # Check if file needs indexing. One stat gives us both size and
+        # mtime_ns; together they form the cache key, so in-place edits that
+        # keep the size identical still trigger a re-index.
         file_needs_indexing = False
-        current_size = os.path.getsize(filepath)
-        
+        st = os.stat(filepath)
+
         if filename not in current_index:
             file_needs_indexing = True
             print(f"   ➕ New file found: {filename}")
-        elif current_index[filename].get('total_size') != current_size:
+        elif (current_index[filename].get('total_size') != st.st_size
+              or current_index[filename].get('mtime_ns') != st.st_mtime_ns):
             file_needs_indexing = True
             print(f"   🔄 File changed (re-indexing): {filename}")
 
@@ -65,19 +71,146 @@ def auto_index_shared_files():
         if file_needs_indexing:
             # CALLING INDEXER FUNCTION DIRECTLY (index_file)
             filename_result, file_entry = index_file(filepath)
-            
+
             if file_entry:
+                # Stamp the signature so unchanged files are skipped next scan
+                file_entry['mtime_ns'] = st.st_mtime_ns
                 current_index[filename] = file_entry
                 files_indexed_count += 1
 
     # 4. Save the updated index back to disk
     if files_indexed_count > 0:
-        with open(LOCAL_MASTER_INDEX_FILE, 'w') as f:
-            json.dump(current_index, f, indent=4)
+        with open(LOCAL_MASTER_INDEX_FILE, 'wb') as f:
+            f.write(fastjson.dumps(current_index, indent=True))
         print(f"   ✅ Auto-Indexing complete. Updated {files_indexed_count} files in index.")
     else:
         print("   ✅ Index is up to date.")
 
+# --- MASTER INDEX CACHE ---
+
+# Re-parsing local_index.json on every request dominates per-request CPU once
+# more than one peer is talking to us. Cache the parsed dict plus an mmap of
+# the file itself, invalidated whenever the file's mtime changes on disk.
+# REQUEST_FILE_LIST ships the mapped bytes straight to the socket, so the
+# valid JSON already sitting on disk is never parsed and re-encoded just to
+# be sent over the wire.
+_INDEX_CACHE = {'mtime': None, 'parsed': None, 'raw_bytes': None, 'chunk_index': None}
+_INDEX_CACHE_LOCK = threading.Lock()
+
+def get_index():
+    """
+    Returns (parsed_index, raw_json_buffer, chunk_index) for
+    LOCAL_MASTER_INDEX_FILE, re-reading the file only when its mtime has
+    changed. raw_json_buffer is an mmap of the on-disk file (zero-copy
+    source for sendall); chunk_index maps (filename, chunk_id) -> chunk
+    metadata so REQUEST_CHUNK lookups are O(1) instead of a list scan.
+    """
+    try:
+        st = os.stat(LOCAL_MASTER_INDEX_FILE)
+    except OSError:
+        return {}, b"{}", {}
+    if st.st_size == 0:
+        return {}, b"{}", {}
+    mtime = st.st_mtime_ns
+
+    with _INDEX_CACHE_LOCK:
+        if _INDEX_CACHE['mtime'] != mtime:
+            with open(LOCAL_MASTER_INDEX_FILE, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            parsed = fastjson.loads(mm[:])
+            _INDEX_CACHE['mtime'] = mtime
+            _INDEX_CACHE['parsed'] = parsed
+            # Replacing the reference drops the stale mmap; it is reclaimed
+            # once any in-flight sendall still reading it finishes.
+            _INDEX_CACHE['raw_bytes'] = mm
+            _INDEX_CACHE['chunk_index'] = {
+                (fname, chunk['id']): chunk
+                for fname, meta in parsed.items()
+                for chunk in meta.get('chunks', [])
+            }
+        return _INDEX_CACHE['parsed'], _INDEX_CACHE['raw_bytes'], _INDEX_CACHE['chunk_index']
+
+
+# The gossiper on every peer polls REPORT_AVAILABILITY periodically while the
+# index barely changes, so memoize the serialized hash list by index mtime.
+_REPORT_CACHE = {'mtime_ns': None, 'payload': None}
+_REPORT_CACHE_LOCK = threading.Lock()
+
+def get_report_payload():
+    """
+    Returns the serialized REPORT_AVAILABILITY hash list, rebuilt only when
+    LOCAL_MASTER_INDEX_FILE's mtime changes.
+    """
+    try:
+        mtime_ns = os.stat(LOCAL_MASTER_INDEX_FILE).st_mtime_ns
+    except OSError:
+        return b'[]'
+
+    with _REPORT_CACHE_LOCK:
+        if _REPORT_CACHE['mtime_ns'] != mtime_ns:
+            joined = b'","'.join(h.encode('ascii') for h in iter_hosted_hashes())
+            _REPORT_CACHE['mtime_ns'] = mtime_ns
+            _REPORT_CACHE['payload'] = (b'["' + joined + b'"]') if joined else b'[]'
+        return _REPORT_CACHE['payload']
+
+
+# --- HOT CHUNK CACHE ---
+
+# Popular chunks (file headers, files many peers want at once) get requested
+# back to back; keep the most recently served payloads in memory, capped by
+# total bytes. Keys include the source file's mtime_ns so entries for a
+# changed file simply stop matching and age out.
+CHUNK_CACHE_MAX_BYTES = 64 * CHUNK_SIZE
+_CHUNK_CACHE = OrderedDict()
+_CHUNK_CACHE_BYTES = 0
+_CHUNK_CACHE_LOCK = threading.Lock()
+
+def get_cached_chunk(filename, chunk_id, mtime_ns):
+    """Returns cached chunk bytes (refreshing LRU order), or None on a miss."""
+    key = (filename, chunk_id, mtime_ns)
+    with _CHUNK_CACHE_LOCK:
+        data = _CHUNK_CACHE.get(key)
+        if data is not None:
+            _CHUNK_CACHE.move_to_end(key)
+        return data
+
+def cache_chunk(filename, chunk_id, mtime_ns, data):
+    """Stores chunk bytes, evicting least-recently-served entries over budget."""
+    global _CHUNK_CACHE_BYTES
+    if len(data) > CHUNK_CACHE_MAX_BYTES:
+        return
+    key = (filename, chunk_id, mtime_ns)
+    with _CHUNK_CACHE_LOCK:
+        if key in _CHUNK_CACHE:
+            return
+        _CHUNK_CACHE[key] = data
+        _CHUNK_CACHE_BYTES += len(data)
+        while _CHUNK_CACHE_BYTES > CHUNK_CACHE_MAX_BYTES:
+            _, evicted = _CHUNK_CACHE.popitem(last=False)
+            _CHUNK_CACHE_BYTES -= len(evicted)
+
+
+# Repeated chunk requests for the same file paid open + seek + read per call.
+# Map each served file once and slice by offset instead: the kernel page
+# cache hands back the bytes with no per-request file syscalls. A mapping is
+# swapped out when the file's mtime changes; the stale mmap is reclaimed once
+# nothing references it (a mapping per shared file is cheap, it's just
+# address space).
+_MMAP_CACHE = {}
+_MMAP_CACHE_LOCK = threading.Lock()
+
+def get_file_mmap(path, mtime_ns):
+    """Returns a read-only mmap of path, remapping when mtime_ns changes."""
+    with _MMAP_CACHE_LOCK:
+        cached = _MMAP_CACHE.get(path)
+        if cached is not None and cached[1] == mtime_ns:
+            return cached[0]
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _MMAP_CACHE[path] = (mm, mtime_ns)
+        return mm
+
+
 # --- CORE SERVER LOGIC (Rest of the functions) ---
 
 def send_file_chunk(client_socket, filename, chunk_id, chunk_hash, chunk_size):
@@ -85,24 +218,23 @@ def send_file_chunk(client_socket, filename, chunk_id, chunk_hash, chunk_size):
     full_path = os.path.join(FILE_DIRECTORY, filename)
 
     if not os.path.exists(full_path):
-        client_socket.sendall(b"ERROR: FILE_NOT_FOUND")
+        send_frame(client_socket, b"ERROR: FILE_NOT_FOUND")
         return
 
     try:
         # Send the CHUNK_READY header
         header = f"CHUNK_READY:{chunk_id}:{chunk_size}:{chunk_hash}"
-        client_socket.sendall(header.encode('utf-8'))
-        client_socket.recv(1024) # Wait for client READY
+        send_frame(client_socket, header)
 
         # Find the starting byte position of the chunk
-        # NOTE: This logic assumes chunk_id * CHUNK_SIZE is the offset, 
+        # NOTE: This logic assumes chunk_id * CHUNK_SIZE is the offset,
         # which is redundant but harmless since the index now provides 'offset'.
-        start_byte = chunk_id * CHUNK_SIZE 
+        start_byte = chunk_id * CHUNK_SIZE
 
+        # Zero-copy send: sendfile(2) pushes the bytes kernel-side on Linux,
+        # so we never allocate the chunk as a Python bytes object.
         with open(full_path, 'rb') as f:
-            f.seek(start_byte)
-            chunk_data = f.read(chunk_size)
-            client_socket.sendall(chunk_data)
+            client_socket.sendfile(f, offset=start_byte, count=chunk_size)
 
         print(f"   ✅ Thread {threading.get_ident()}: Sent Chunk {chunk_id} of '{filename}'.")
 
@@ -111,114 +243,128 @@ def send_file_chunk(client_socket, filename, chunk_id, chunk_hash, chunk_size):
 
 
 def handle_peer_connection(client_socket, peer_ip):
-    """Runs in a new thread for every incoming connection."""
+    """Runs in a new thread; serves framed commands until the peer disconnects."""
     thread_id = threading.get_ident()
-    
+    # Commands and headers are tiny writes; don't let Nagle hold them back
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
     try:
-        data = client_socket.recv(1024).decode('utf-8').strip()
-        
-        if data == "REQUEST_FILE_LIST":
-            print(f"   ➡️ Thread {thread_id}: Request File List")
-            
-            # LOAD REAL INDEX
-            if os.path.exists(LOCAL_MASTER_INDEX_FILE):
-                with open(LOCAL_MASTER_INDEX_FILE, 'r') as f:
-                    # Read the JSON as a string directly
-                    file_index_json = f.read() 
-            else:
-                file_index_json = "{}"
-
-            header = f"LIST_SIZE:{len(file_index_json)}"
-            client_socket.sendall(header.encode('utf-8'))
-            client_socket.recv(1024) 
-            client_socket.sendall(file_index_json.encode('utf-8'))
-
-
-        elif data.startswith("REQUEST_CHUNK:"):
-            # Command format: REQUEST_CHUNK:filename:chunk_id
-            try:
-                parts = data.split(":")
-                requested_filename = parts[1]
-                requested_chunk_id = int(parts[2])
-                
-                print(f"   ➡️ Thread {thread_id}: Request for {requested_filename} (Chunk {requested_chunk_id})")
-
-                # 1. Load the Master Index to find where this chunk lives
-                if not os.path.exists(LOCAL_MASTER_INDEX_FILE):
-                    client_socket.sendall(b"ERROR: INDEX_NOT_FOUND")
-                    return
-
-                with open(LOCAL_MASTER_INDEX_FILE, 'r') as f:
-                    master_index = json.load(f)
-
-                # 2. Lookup File and Chunk Metadata
-                if requested_filename in master_index:
-                    file_meta = master_index[requested_filename]
-                    chunks = file_meta.get('chunks', [])
-                    
-                    # Find the specific chunk by ID
-                    target_chunk = next((c for c in chunks if c['id'] == requested_chunk_id), None)
-                    
-                    if target_chunk:
-                        # 3. We found the chunk metadata, now read the actual bytes
-                        real_file_path = os.path.join(FILE_DIRECTORY, requested_filename)
-                        
-                        if os.path.exists(real_file_path):
-                            with open(real_file_path, 'rb') as f:
-                                f.seek(target_chunk['offset']) # Use the offset from the index
-                                chunk_data = f.read(target_chunk['size'])
-                                
-                                # 4. Send the CHUNK_READY header with REAL metadata
-                                header = f"CHUNK_READY:{target_chunk['id']}:{target_chunk['size']}:{target_chunk['hash']}"
-                                client_socket.sendall(header.encode('utf-8'))
-                                client_socket.recv(1024) # Wait for READY
-                                client_socket.sendall(chunk_data)
-                                print(f"   ✅ Sent Chunk {requested_chunk_id}")
-                        else:
-                            print(f"   ❌ File exists in index but NOT on disk: {real_file_path}")
-                            client_socket.sendall(b"ERROR: FILE_MISSING_ON_DISK")
-                    else:
-                        client_socket.sendall(b"ERROR: CHUNK_ID_NOT_FOUND")
-                else:
-                    client_socket.sendall(b"ERROR: FILENAME_NOT_IN_INDEX")
+        # Persistent connection: one TCP handshake serves any number of
+        # commands, so a whole file downloads without O(chunks) reconnects.
+        while True:
+            frame = recv_frame(client_socket)
+            if not frame:
+                break # Peer closed the connection
+            handler = COMMAND_HANDLERS.get(frame[0])
+            if handler is None:
+                send_frame(client_socket, b"ERROR: Unknown command.")
+                continue
+            handler(client_socket, peer_ip, frame, thread_id)
 
-            except Exception as e:
-                print(f"Error handling chunk request: {e}")
-                client_socket.sendall(b"ERROR: INTERNAL_SERVER_ERROR")
-            
-        elif data == "REQUEST_PEER_LIST":
-            # Gossip Protocol for discovery
-            current_peers = load_peers()
-            if peer_ip not in current_peers:
-                current_peers.append(peer_ip)
-                save_peers(current_peers)
-                print(f"   ➕ Learned new peer: {peer_ip}")
-
-            peer_list_json = json.dumps(current_peers)
-            header = f"PEER_LIST_SIZE:{len(peer_list_json)}"
-            client_socket.sendall(header.encode('utf-8'))
-            client_socket.recv(1024) 
-            client_socket.sendall(peer_list_json.encode('utf-8'))
-            
-        elif data == "REPORT_AVAILABILITY":
-            # Audit Protocol for self-healing
-            hosted_hashes = get_local_hosted_hashes() 
-            hashes_json = json.dumps(hosted_hashes)
-            header = f"HASH_LIST_SIZE:{len(hashes_json)}"
-            client_socket.sendall(header.encode('utf-8'))
-            client_socket.recv(1024)
-            client_socket.sendall(hashes_json.encode('utf-8'))
-            
-        else:
-            client_socket.sendall(b"ERROR: Unknown command.")
-            
     except Exception as e:
         print(f"❌ Thread {thread_id}: Connection error with {peer_ip}: {e}")
-        
+
     finally:
         client_socket.close()
 
 
+def handle_file_list_request(client_socket, peer_ip, frame, thread_id):
+    """OP_LIST: sends the full master index."""
+    print(f"   ➡️ Thread {thread_id}: Request File List")
+
+    # LOAD REAL INDEX (served straight from the mtime-keyed cache)
+    _, file_index_bytes, _ = get_index()
+
+    # Header and payload go back-to-back: TCP already guarantees ordered
+    # delivery, so waiting for a READY just burned an overlay RTT
+    header = f"LIST_SIZE:{len(file_index_bytes)}"
+    send_frame(client_socket, header)
+    client_socket.sendall(file_index_bytes)
+
+
+def handle_chunk_request(client_socket, peer_ip, frame, thread_id):
+    """OP_CHUNK: sends one chunk's bytes after a CHUNK_READY header."""
+    try:
+        requested_filename, requested_chunk_id = unpack_chunk_request(frame)
+
+        print(f"   ➡️ Thread {thread_id}: Request for {requested_filename} (Chunk {requested_chunk_id})")
+
+        # 1. Load the Master Index to find where this chunk lives
+        if not os.path.exists(LOCAL_MASTER_INDEX_FILE):
+            send_frame(client_socket, b"ERROR: INDEX_NOT_FOUND")
+            return
+
+        master_index, _, chunk_index = get_index()
+
+        # 2. Lookup File and Chunk Metadata
+        if requested_filename in master_index:
+            # O(1) lookup in the precomputed (filename, chunk_id) map
+            target_chunk = chunk_index.get((requested_filename, requested_chunk_id))
+
+            if target_chunk:
+                # 3. We found the chunk metadata, now read the actual bytes
+                real_file_path = os.path.join(FILE_DIRECTORY, requested_filename)
+
+                if os.path.exists(real_file_path):
+                    mtime_ns = os.stat(real_file_path).st_mtime_ns
+
+                    # 4. Serve from the hot-chunk cache; a miss slices the
+                    # file's mmap so even cold chunks skip open/seek/read
+                    chunk_data = get_cached_chunk(
+                        requested_filename, requested_chunk_id, mtime_ns)
+                    if chunk_data is None:
+                        mm = get_file_mmap(real_file_path, mtime_ns)
+                        offset = target_chunk['offset']
+                        chunk_data = bytes(mm[offset:offset + target_chunk['size']])
+                        cache_chunk(requested_filename, requested_chunk_id,
+                                    mtime_ns, chunk_data)
+
+                    # 5. Send the CHUNK_READY header with REAL metadata
+                    header = f"CHUNK_READY:{target_chunk['id']}:{target_chunk['size']}:{target_chunk['hash']}"
+                    send_frame(client_socket, header)
+                    client_socket.sendall(chunk_data)
+                    print(f"   ✅ Sent Chunk {requested_chunk_id}")
+                else:
+                    print(f"   ❌ File exists in index but NOT on disk: {real_file_path}")
+                    send_frame(client_socket, b"ERROR: FILE_MISSING_ON_DISK")
+            else:
+                send_frame(client_socket, b"ERROR: CHUNK_ID_NOT_FOUND")
+        else:
+            send_frame(client_socket, b"ERROR: FILENAME_NOT_IN_INDEX")
+
+    except Exception as e:
+        print(f"Error handling chunk request: {e}")
+        send_frame(client_socket, b"ERROR: INTERNAL_SERVER_ERROR")
+
+
+def handle_peer_list_request(client_socket, peer_ip, frame, thread_id):
+    """OP_PEERS: gossip exchange (in-memory set, persisted only on change)."""
+    if add_peer(peer_ip):
+        print(f"   ➕ Learned new peer: {peer_ip}")
+
+    peer_list_json = fastjson.dumps(list(load_peers()))
+    header = f"PEER_LIST_SIZE:{len(peer_list_json)}"
+    send_frame(client_socket, header)
+    client_socket.sendall(peer_list_json)
+
+
+def handle_report_request(client_socket, peer_ip, frame, thread_id):
+    """OP_REPORT: audit protocol for self-healing (payload cached by mtime)."""
+    hashes_json = get_report_payload()
+    header = f"HASH_LIST_SIZE:{len(hashes_json)}"
+    send_frame(client_socket, header)
+    client_socket.sendall(hashes_json)
+
+
+# Opcode -> handler dispatch table for the connection loop
+COMMAND_HANDLERS = {
+    OP_LIST: handle_file_list_request,
+    OP_CHUNK: handle_chunk_request,
+    OP_PEERS: handle_peer_list_request,
+    OP_REPORT: handle_report_request,
+}
+
+
 # --- GOSSIPER THREAD (Simplified Audit/Repair) ---
 
 GOSSIP_INTERVAL_SECONDS = 180  # 3 minutes
@@ -228,8 +374,8 @@ def exchange_peers(target_ip, port):
     client_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
     try:
         client_socket.connect((target_ip, port))
-        client_socket.sendall("REQUEST_PEER_LIST".encode('utf-8'))
-        
+        send_frame(client_socket, bytes([OP_PEERS]))
+
         # Omitted: Full header parsing and list merging for brevity
         client_socket.close()
         # print(f"   [Gossip]: Synced with {target_ip[:10]}")
@@ -251,13 +397,16 @@ class PeerGossiper(threading.Thread):
             
             # 1. Exchange lists to discover new peers
             for target_ip in list(current_peers):
-                if target_ip != HOST_YGGDRASIL_IP:
+                if target_ip != host_ip():
                     exchange_peers(target_ip, self.port)
             
             # 2. **Audit & Repair Logic Placeholder:**
             # Here is where the heavy logic from the last step would run
             # to check if "hash_A_chunk0" is hosted by enough peers (R=3).
-            
+
+            # Persist any peer additions that the write throttle deferred
+            flush_peers()
+
             self.stop_event.wait(GOSSIP_INTERVAL_SECONDS)
 
     def stop(self):
@@ -266,48 +415,76 @@ class PeerGossiper(threading.Thread):
 
 # --- MAIN SERVER STARTUP ---
 
+# Bounded handler pool: a thread per inbound connection is unbounded memory
+# and trivially DoS-able; 64 workers is plenty for a hobby swarm.
+MAX_HANDLER_THREADS = 64
+
+# Multiple listener sockets sharing the port via SO_REUSEPORT: the kernel
+# balances accepts across them, so one busy accept loop + the GIL no longer
+# serializes new-connection handling.
+NUM_LISTENERS = min(4, os.cpu_count() or 1)
+
+def make_listener():
+    """Creates one bound, listening socket on the wildcard IPv6 address."""
+    s = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    # Wildcard bind ('::') is more reliable than binding the Yggdrasil IP
+    # directly and lets every listener share the same port
+    s.bind(('::', PORT))
+    s.listen(128)
+    return s
+
+def accept_loop(server_socket, executor):
+    """Accepts connections on one listener and hands them to the pool."""
+    while True:
+        client_socket, client_address = server_socket.accept()
+        peer_ip = client_address[0]
+        executor.submit(handle_peer_connection, client_socket, peer_ip)
+
 def start_server():
     # 1. Ensure basic environment setup (directories, etc.)
     ensure_initial_setup()
-    
+
     # 2. AUTO-INDEXER RUNS ONCE AT STARTUP
     auto_index_shared_files()
-    
-    server_socket = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    
+
+    executor = ThreadPoolExecutor(max_workers=MAX_HANDLER_THREADS,
+                                  thread_name_prefix="peer-handler")
+    listeners = []
+    gossiper = None
+
     try:
-        # Using the HOST_YGGDRASIL_IP for bind as per your successful debugging, 
-        # but recommend ('::', PORT) for reliability on some Windows/Linux setups.
-        server_socket.bind((HOST_YGGDRASIL_IP, PORT))
-        server_socket.listen(10)
-        
+        listeners = [make_listener() for _ in range(NUM_LISTENERS)]
+
         # Start the background gossiper thread
         gossiper = PeerGossiper(PORT)
-        gossiper.daemon = True 
+        gossiper.daemon = True
         gossiper.start()
-        
-        print(f"\n✅ Yggdrasil Server running on {HOST_YGGDRASIL_IP}:{PORT}")
+
+        print(f"\n✅ Yggdrasil Server running on [::]:{PORT} "
+              f"({NUM_LISTENERS} listeners, host {host_ip()})")
         print(f"   Gossip/Audit running every {GOSSIP_INTERVAL_SECONDS}s...")
-        
-        while True:
-            # Main thread accepts connections and hands them off
-            client_socket, client_address = server_socket.accept()
-            peer_ip = client_address[0]
-            
-            peer_thread = threading.Thread(
-                target=handle_peer_connection, 
-                args=(client_socket, peer_ip)
-            )
-            peer_thread.start()
+
+        # Extra listeners get their own accept threads; the main thread
+        # runs the last one so Ctrl-C still lands somewhere useful
+        for extra in listeners[1:]:
+            t = threading.Thread(target=accept_loop, args=(extra, executor))
+            t.daemon = True
+            t.start()
+        accept_loop(listeners[0], executor)
 
     except KeyboardInterrupt:
         print("\n[SERVER] Shutdown requested.")
     except Exception as e:
         print(f"❌ Critical server error: {e}")
     finally:
-        gossiper.stop()
-        server_socket.close()
+        if gossiper is not None:
+            gossiper.stop()
+        executor.shutdown(wait=False)
+        for s in listeners:
+            s.close()
 
 if __name__ == "__main__":
     start_server()